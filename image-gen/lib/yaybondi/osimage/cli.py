@@ -217,16 +217,10 @@ class ImageGenCli:
         if not os.path.isdir(sysroot):
             raise ImageGenCli.Error("no such directory: {}".format(sysroot))
 
-        kwargs = {
-            "release":
-                ImageGeneratorUtils.determine_target_release(sysroot),
-            "libc":
-                ImageGeneratorUtils.determine_target_libc(sysroot),
-            "arch":
-                ImageGeneratorUtils.determine_target_arch(sysroot),
-        }
+        release, libc, arch = \
+            ImageGeneratorUtils.determine_target_triplet(sysroot)
 
-        release, libc, arch = kwargs["release"], kwargs["libc"], kwargs["arch"]
+        kwargs = {"release": release, "libc": libc, "arch": arch}
 
         if len(args) < 2:
             print_usage(
@@ -285,14 +279,10 @@ class ImageGenCli:
         if not os.path.isdir(sysroot):
             raise ImageGenCli.Error("no such directory: {}".format(sysroot))
 
-        kwargs = {
-            "release":
-                ImageGeneratorUtils.determine_target_release(sysroot),
-            "libc":
-                ImageGeneratorUtils.determine_target_libc(sysroot),
-            "arch":
-                ImageGeneratorUtils.determine_target_arch(sysroot),
-        }
+        release, libc, arch = \
+            ImageGeneratorUtils.determine_target_triplet(sysroot)
+
+        kwargs = {"release": release, "libc": libc, "arch": arch}
 
         if os.geteuid() != 0:
             raise ImageGenCli.Error(
@@ -352,16 +342,10 @@ class ImageGenCli:
         if not os.path.isdir(sysroot):
             raise ImageGenCli.Error("no such directory: {}".format(sysroot))
 
-        kwargs = {
-            "release":
-                ImageGeneratorUtils.determine_target_release(sysroot),
-            "libc":
-                ImageGeneratorUtils.determine_target_libc(sysroot),
-            "arch":
-                ImageGeneratorUtils.determine_target_arch(sysroot),
-        }
+        release, libc, arch = \
+            ImageGeneratorUtils.determine_target_triplet(sysroot)
 
-        release, libc, arch = kwargs["release"], kwargs["libc"], kwargs["arch"]
+        kwargs = {"release": release, "libc": libc, "arch": arch}
 
         if len(args) < 2:
             print_usage(
@@ -27,7 +27,6 @@ import collections
 import logging
 import os
 import re
-import shlex
 import shutil
 import tempfile
 import textwrap
@@ -42,6 +41,17 @@ LOGGER = logging.getLogger(__name__)
 
 class ImageGenerator:
 
+    __slots__ = (
+        "_release",
+        "_arch",
+        "_libc",
+        "_verify",
+        "_repo_base",
+        "_config_files",
+        "_realroots",
+        "context",
+    )
+
     OPKG_OPTIONS_TEMPLATE = textwrap.dedent(
         """\
         dest root /
@@ -82,11 +92,29 @@ class ImageGenerator:
         (0o0755, "/var"),
     ]
 
+    FILES_TO_COPY = [
+        "/etc/hosts",
+        "/etc/resolv.conf",
+    ]
+
     DIRS_TO_CLEAN = [
         "/tmp",
         "/var/tmp",
     ]
 
+    ENV_VARS_TO_KEEP = frozenset([
+        "BUILD_BOX_WRAPPER_A883DAFC",
+        "DISPLAY",
+        "SSH_CONNECTION",
+        "SSH_CLIENT",
+        "SSH_TTY",
+        "USER",
+        "TERM",
+        "HOME",
+        "PYTHONPATH",
+        "PYTHONUNBUFFERED",
+    ])
+
     ETC_PASSWD = textwrap.dedent(
         """\
         root:x:0:0:root:/root:/bin/sh
@@ -162,6 +190,17 @@ class ImageGenerator:
         """
     )
 
+    CONFIG_FILES = [
+        ("/etc/opkg/arch.conf",    OPKG_ARCH_TEMPLATE),
+        ("/etc/opkg/options.conf", OPKG_OPTIONS_TEMPLATE),
+        ("/etc/opkg/feeds.conf",   OPKG_FEEDS_TEMPLATE),
+        ("/etc/passwd",            ETC_PASSWD),
+        ("/etc/group",             ETC_GROUP),
+        ("/etc/hosts",             ETC_HOSTS),
+    ]
+
+    CAMEL_CASE_REGEX = re.compile(r"([a-z])([A-Z])")
+
     class Error(BondiError):
         pass
 
@@ -207,21 +246,51 @@ class ImageGenerator:
             "repo_base":
                 self._repo_base
         }
+
+        # The context is fixed from here on, render the templates only once.
+        # Templates without placeholders are used verbatim.
+        self._config_files = [
+            (
+                conffile,
+                (
+                    template.format(**self.context) if "{" in template
+                    else template
+                ).encode("utf-8")
+            )
+            for conffile, template in self.CONFIG_FILES
+        ]
+
+        self._realroots = {}
     #end function
 
     def prepare(self, sysroot):
-        if not os.path.isdir(sysroot):
-            raise ImageGenerator.Error("no such directory: {}".format(sysroot))
+        sysroot = self._resolve_sysroot(sysroot)
 
         LOGGER.info("preparing system root.")
 
-        sysroot = os.path.realpath(sysroot)
-
-        for mode, dirname in self.DIRS_TO_CREATE:
-            full_path = sysroot + dirname
-            os.makedirs(full_path, exist_ok=True)
-            os.chmod(full_path, mode)
-        #end for
+        # Parents are listed before their children, so a plain mkdir with
+        # the final mode suffices. The umask must not interfere with it.
+        old_umask = os.umask(0)
+        try:
+            for mode, dirname in self.DIRS_TO_CREATE:
+                full_path = sysroot + dirname
+
+                # mkdir is not guaranteed to apply bits beyond 0o777, only
+                # chmod when those are needed or an existing dir differs.
+                try:
+                    os.mkdir(full_path, mode)
+                    if not mode & ~0o777:
+                        continue
+                except FileExistsError:
+                    if os.stat(full_path).st_mode & 0o7777 == mode:
+                        continue
+                #end try
+
+                os.chmod(full_path, mode)
+            #end for
+        finally:
+            os.umask(old_umask)
+        #end try
 
         var_run_symlink = sysroot + "/var/run"
         if not os.path.exists(var_run_symlink):
@@ -229,66 +298,58 @@ class ImageGenerator:
 
         self._write_config_files(sysroot)
 
-        files_to_copy = [
-            "/etc/hosts",
-            "/etc/resolv.conf",
-        ]
-
-        for file_ in files_to_copy:
-            shutil.copy2(file_, sysroot + file_)
+        # The host's files replace the generic ones for the duration of the
+        # build. Metadata does not matter, copyfile uses sendfile under the
+        # hood.
+        for file_ in self.FILES_TO_COPY:
+            shutil.copyfile(file_, sysroot + file_)
 
         with tempfile.TemporaryDirectory() as tmpdir:
-            opkg_cmd = shlex.split(
-                "opkg --tmp-dir '{}' --offline-root '{}' update"
-                .format(tmpdir, sysroot)
-            )
+            opkg_cmd = [
+                "opkg",
+                "--tmp-dir", tmpdir,
+                "--offline-root", sysroot,
+                "update"
+            ]
             Subprocess.run(sysroot, opkg_cmd[0], opkg_cmd)
         #end with
     #end function
 
     def customize(self, sysroot, specfile):
-        if not os.path.isdir(sysroot):
-            raise ImageGenerator.Error("no such directory: {}".format(sysroot))
+        sysroot = self._resolve_sysroot(sysroot)
         if not os.path.isfile(specfile):
             raise ImageGenerator.Error("no such file: {}".format(specfile))
 
         LOGGER.info("================")
-        LOGGER.info("loading specfile {}".format(specfile))
+        LOGGER.info("loading specfile %s", specfile)
         LOGGER.info("================")
 
-        sysroot = os.path.realpath(sysroot)
-
         with open(specfile, "r", encoding="utf-8") as f:
             parts = SpecfileParser.load(f)
 
         env = self._prepare_environment(sysroot)
 
         for start_line, end_line, p in parts:
-            what = re.sub(
-                r"([a-z])([A-Z])", r"\1 \2",
-                p.__class__.__name__
-            ).lower()
+            if LOGGER.isEnabledFor(logging.INFO):
+                what = self.CAMEL_CASE_REGEX.sub(
+                    r"\1 \2", p.__class__.__name__
+                ).lower()
 
-            LOGGER.info(
-                "applying {} from line {} to {}.".format(
+                LOGGER.info(
+                    "applying %s from line %d to %d.",
                     what, start_line, end_line
                 )
-            )
+            #end if
 
             p.apply(sysroot, env=env)
         #end for
     #end function
 
     def cleanup(self, sysroot):
-        if not os.path.isdir(sysroot):
-            raise ImageGenerator.Error("no such directory: {}".format(sysroot))
-
-        sysroot = os.path.realpath(sysroot)
+        sysroot = self._resolve_sysroot(sysroot)
 
         if os.path.exists(sysroot + "/usr/bin/opkg"):
-            opkg_cmd = shlex.split(
-                "opkg --offline-root '{}' clean".format(sysroot)
-            )
+            opkg_cmd = ["opkg", "--offline-root", sysroot, "clean"]
 
             Subprocess.run(sysroot, opkg_cmd[0], opkg_cmd, check=False)
         #end if
@@ -299,15 +360,17 @@ class ImageGenerator:
         except OSError:
             pass
 
+        # Only the contents are removed, the directories themselves keep
+        # their owner and mode.
         for directory in self.DIRS_TO_CLEAN:
-            full_path = sysroot + directory
-
-            stat = os.lstat(full_path)
-            shutil.rmtree(full_path)
-
-            os.makedirs(full_path)
-            os.chown(full_path, stat.st_uid, stat.st_gid)
-            os.chmod(full_path, stat.st_mode)
+            dir_fd = os.open(
+                sysroot + directory,
+                os.O_RDONLY | os.O_DIRECTORY | os.O_NOFOLLOW
+            )
+            try:
+                self._remove_dir_contents(dir_fd)
+            finally:
+                os.close(dir_fd)
         #end for
     #end function
 
@@ -334,26 +397,29 @@ class ImageGenerator:
 
     # HELPERS
 
+    def _resolve_sysroot(self, sysroot):
+        if not os.path.isdir(sysroot):
+            raise ImageGenerator.Error("no such directory: {}".format(sysroot))
+
+        # bootstrap runs customize once per specfile on the same sysroot.
+        try:
+            return self._realroots[sysroot]
+        except KeyError:
+            realroot = self._realroots[sysroot] = os.path.realpath(sysroot)
+        return realroot
+    #end function
+
     def _prepare_environment(self, sysroot):
-        env = {}
-
-        entries_to_keep = {
-            "BUILD_BOX_WRAPPER_A883DAFC",
-            "DISPLAY",
-            "SSH_CONNECTION",
-            "SSH_CLIENT",
-            "SSH_TTY",
-            "USER",
-            "TERM",
-            "HOME",
-            "PYTHONPATH",
-            "PYTHONUNBUFFERED",
-        }
+        environ = os.environ
 
-        for key in list(os.environ.keys()):
-            if not (key.startswith("BONDI_") or key in entries_to_keep):
-                continue
-            env[key] = os.environ[key]
+        env = {
+            key: environ[key]
+            for key in self.ENV_VARS_TO_KEEP & environ.keys()
+        }
+        env.update(
+            (key, value) for key, value in environ.items()
+            if key.startswith("BONDI_")
+        )
 
         # These cannot be overridden by user.
         env["BONDI_SYSROOT"]   = sysroot
@@ -365,28 +431,41 @@ class ImageGenerator:
         return env
     #end function
 
-    def _write_config_files(self, sysroot):
-        conffile_list = [
-            "/etc/opkg/arch.conf",
-            "/etc/opkg/options.conf",
-            "/etc/opkg/feeds.conf",
-            "/etc/passwd",
-            "/etc/group",
-            "/etc/hosts",
-        ]
-
-        template_list = [
-            self.OPKG_ARCH_TEMPLATE,
-            self.OPKG_OPTIONS_TEMPLATE,
-            self.OPKG_FEEDS_TEMPLATE,
-            self.ETC_PASSWD,
-            self.ETC_GROUP,
-            self.ETC_HOSTS,
-        ]
+    def _remove_dir_contents(self, dir_fd):
+        with os.scandir(dir_fd) as it:
+            entries = list(it)
+
+        for entry in entries:
+            # Answered from the directory entry, no stat needed.
+            if entry.is_dir(follow_symlinks=False):
+                sub_fd = os.open(
+                    entry.name,
+                    os.O_RDONLY | os.O_DIRECTORY | os.O_NOFOLLOW,
+                    dir_fd=dir_fd
+                )
+                try:
+                    self._remove_dir_contents(sub_fd)
+                finally:
+                    os.close(sub_fd)
+
+                os.rmdir(entry.name, dir_fd=dir_fd)
+            else:
+                os.unlink(entry.name, dir_fd=dir_fd)
+            #end if
+        #end for
+    #end function
 
-        for conffile, template in zip(conffile_list, template_list):
-            with open(sysroot + conffile, "w+", encoding="utf-8") as f:
-                f.write(template.format(**self.context))
+    def _write_config_files(self, sysroot):
+        for conffile, contents in self._config_files:
+            fd = os.open(
+                sysroot + conffile, os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+                0o644
+            )
+            try:
+                os.write(fd, contents)
+            finally:
+                os.close(fd)
+        #end for
     #end function
 
 #end class
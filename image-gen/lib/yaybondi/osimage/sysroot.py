@@ -23,17 +23,38 @@
 # THE SOFTWARE.
 #
 
+import ctypes
+import errno
 import logging
 import os
-import shlex
+import select
 import signal
 import subprocess
 import time
 
+from ctypes.util import find_library
+
 from yaybondi.error import BondiError
 
 LOGGER = logging.getLogger(__name__)
 
+MS_BIND = 0x1000
+
+try:
+    libc = ctypes.CDLL(find_library("c"), use_errno=True)
+    libc.mount.argtypes = [
+        ctypes.c_char_p,
+        ctypes.c_char_p,
+        ctypes.c_char_p,
+        ctypes.c_ulong,
+        ctypes.c_void_p
+    ]
+    libc.mount.restype = ctypes.c_int
+    libc.umount2.argtypes = [ctypes.c_char_p, ctypes.c_int]
+    libc.umount2.restype = ctypes.c_int
+except (OSError, AttributeError):
+    libc = None
+
 class Sysroot:
 
     class Error(BondiError):
@@ -41,6 +62,9 @@ class Sysroot:
 
     MOUNTPOINTS = ["dev", "proc", "sys"]
 
+    # Seconds to wait for processes to exit after each signal.
+    TERMINATE_TIMEOUT = 0.8
+
     def __init__(self, sysroot):
         self.sysroot = os.path.realpath(sysroot)
 
@@ -65,66 +89,127 @@ class Sysroot:
             src = os.sep + mountpoint
             dst = self.sysroot + src
 
-            if not self._is_mounted(dst):
-                LOGGER.warning('"{dst}" is not mounted.'.format(dst=dst))
-            else:
-                self._umount(dst)
+            self._umount(dst)
         #end for
 
         return False
     #end function
 
     def terminate_processes(self):
-        found = True
+        while True:
+            pids = self._find_processes()
+            if not pids:
+                break
 
-        while found:
-            found = False
+            for sig in [signal.SIGTERM, signal.SIGKILL]:
+                pids = self._signal_and_wait(pids, sig)
+                if not pids:
+                    break
+            #end for
+        #end while
+    #end function
 
-            for entry in os.listdir("/proc"):
-                try:
-                    pid = int(entry)
-                except ValueError:
-                    continue
+    # HELPERS
+
+    def _find_processes(self):
+        pids = []
+
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
 
+            # The kernel reports the root of a process as a canonical path,
+            # so a single readlink replaces a full realpath walk.
+            try:
+                proc_root = os.readlink(f"/proc/{entry}/root")
+            except OSError:
+                continue
+
+            if self.sysroot == proc_root:
+                pids.append(int(entry))
+        #end for
+
+        return pids
+    #end function
+
+    def _signal_and_wait(self, pids, sig):
+        poller = select.poll()
+        pidfds = {}
+        fallback = []
+
+        try:
+            for pid in pids:
                 try:
-                    proc_root = os.path.normpath(
-                        os.path.realpath("/proc/{}/root".format(entry))
-                    )
-                except (PermissionError, FileNotFoundError):
+                    pidfd = os.pidfd_open(pid)
+                except ProcessLookupError:
                     continue
-
-                if self.sysroot != proc_root:
+                except (AttributeError, OSError):
+                    # No pidfd support in Python (< 3.9) or kernel (< 5.3).
+                    fallback.append(pid)
                     continue
+                #end try
 
-                found = True
+                pidfds[pidfd] = pid
 
                 try:
-                    proc_entry = "/proc/{}".format(entry)
-
-                    os.kill(pid, signal.SIGTERM)
-                    for i in range(10):
-                        os.lstat(proc_entry)
-                        time.sleep(0.05 * 1.1**i)
-
-                    os.kill(pid, signal.SIGKILL)
-                    for i in range(10):
-                        os.lstat(proc_entry)
-                        time.sleep(0.05 * 1.1**i)
-                except (ProcessLookupError, FileNotFoundError):
+                    signal.pidfd_send_signal(pidfd, sig)
+                except ProcessLookupError:
                     pass
+
+                poller.register(pidfd, select.POLLIN)
             #end for
-        #end while
-    #end function
 
-    # HELPERS
+            # A pidfd becomes readable when its process exits.
+            deadline = time.monotonic() + self.TERMINATE_TIMEOUT
+
+            while pidfds:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+
+                for pidfd, _ in poller.poll(timeout * 1000):
+                    poller.unregister(pidfd)
+                    os.close(pidfd)
+                    del pidfds[pidfd]
+                #end for
+            #end while
+
+            remaining = list(pidfds.values())
+        finally:
+            for pidfd in pidfds:
+                os.close(pidfd)
+        #end try
+
+        for pid in fallback:
+            proc_entry = f"/proc/{pid}"
+
+            try:
+                os.kill(pid, sig)
+                for i in range(10):
+                    os.lstat(proc_entry)
+                    time.sleep(0.05 * 1.1**i)
+                remaining.append(pid)
+            except (ProcessLookupError, FileNotFoundError):
+                pass
+        #end for
+
+        return remaining
+    #end function
 
     def _is_mounted(self, path):
-        with open("/proc/mounts", "r", encoding="utf-8") as f:
+        target = os.path.realpath(path)
+
+        with open("/proc/mounts", "rb") as f:
             buf = f.read()
 
         for line in buf.splitlines():
-            _, mountpoint, _, _, _, _ = line.strip().split()
-            if os.path.realpath(mountpoint) == os.path.realpath(path):
+            fields = line.split(b" ", 2)
+            if len(fields) < 3:
+                continue
+
+            # Mountpoints in the kernel's table are usually canonical already.
+            mountpoint = os.fsdecode(fields[1])
+            if mountpoint == target or os.path.realpath(mountpoint) == target:
                 return True
         #end for
 
@@ -132,23 +217,74 @@ class Sysroot:
     #end function
 
     def _bind_mount(self, src, dst):
+        if libc is None:
+            self._bind_mount_subprocess(src, dst)
+            return
+
+        if libc.mount(
+                os.fsencode(src), os.fsencode(dst), None, MS_BIND, None) != 0:
+            LOGGER.warning(
+                'failed to mount "{src}" on "{dst}": {msg}'.format(
+                    src=src, dst=dst, msg=os.strerror(ctypes.get_errno())
+                )
+            )
+    #end function
+
+    def _umount(self, path):
+        if libc is None:
+            if not self._is_mounted(path):
+                LOGGER.warning('"{path}" is not mounted.'.format(path=path))
+            else:
+                self._umount_subprocess(path)
+            return
+        #end if
+
+        if libc.umount2(os.fsencode(path), 0) == 0:
+            return
+
+        # umount2 fails with EINVAL if path is not a mountpoint.
+        errno_ = ctypes.get_errno()
+
+        if errno_ == errno.EINVAL:
+            LOGGER.warning('"{path}" is not mounted.'.format(path=path))
+        else:
+            LOGGER.warning(
+                'failed to umount "{path}": {msg}'.format(
+                    path=path, msg=os.strerror(errno_)
+                )
+            )
+        #end if
+    #end function
+
+    def _bind_mount_subprocess(self, src, dst):
         proc = subprocess.run(
-            shlex.split("mount -o bind {src} {dst}".format(src=src, dst=dst)),
+            ["mount", "-o", "bind", src, dst],
+            stderr=subprocess.PIPE,
             check = False
         )
         if proc.returncode != 0:
             LOGGER.warning(
-                'failed to mount "{src}" on "{dst}".'.format(src=src, dst=dst)
+                'failed to mount "{src}" on "{dst}": {msg}'.format(
+                    src=src,
+                    dst=dst,
+                    msg=proc.stderr.decode("utf-8", errors="replace").strip()
+                )
             )
     #end function
 
-    def _umount(self, path):
+    def _umount_subprocess(self, path):
         proc = subprocess.run(
-            shlex.split("umount {path}".format(path=path)),
+            ["umount", path],
+            stderr=subprocess.PIPE,
             check = False
         )
         if proc.returncode != 0:
-            LOGGER.warning('failed to umount "{path}".'.format(path=path))
+            LOGGER.warning(
+                'failed to umount "{path}": {msg}'.format(
+                    path=path,
+                    msg=proc.stderr.decode("utf-8", errors="replace").strip()
+                )
+            )
     #end function
 
 #end class
@@ -23,9 +23,12 @@
 # THE SOFTWARE.
 #
 
+import functools
 import os
 import re
 
+from concurrent.futures import ThreadPoolExecutor
+
 from yaybondi.error import BondiError
 
 class ImageGeneratorUtils:
@@ -37,6 +40,17 @@ class ImageGeneratorUtils:
         "/{release}/{libc}/{arch}"
     ]
 
+    SCRIPT_IDENTIFIER_REGEX = re.compile(r"^[-a-zA-Z0-9_.]+$")
+
+    NON_TARGET_ARCHS = frozenset(["all", "tools"])
+
+    CUSTOMIZE_DIR = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "customize"
+    )
+    PACKAGE_DIR = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "package"
+    )
+
     class Error(BondiError):
         pass
 
@@ -53,65 +67,43 @@ class ImageGeneratorUtils:
     #end function
 
     @staticmethod
-    def determine_target_release(sysroot):
+    def determine_target_triplet(sysroot):
         ImageGeneratorUtils.raise_unless_sysroot_exists(sysroot)
 
-        os_release = sysroot + "/etc/os-release"
-
-        if os.path.exists(os_release):
-            with open(os_release, "r", encoding="utf-8") as f:
-                for line in f:
-                    m = re.match(
-                        r"^\s*VERSION_CODENAME\s*=\s*(?P<release>\S+)\s*$",
-                        line
-                    )
-                    if m:
-                        return m.group("release")
-                #end for
-            #end with
-        #end if
+        readers = [
+            ImageGeneratorUtils._read_target_release,
+            ImageGeneratorUtils._read_target_libc,
+            ImageGeneratorUtils._read_target_arch,
+        ]
+
+        # Overlap the file system round trips, which dominate on slow or
+        # network-backed sysroots.
+        with ThreadPoolExecutor(max_workers=len(readers)) as executor:
+            futures = [executor.submit(read, sysroot) for read in readers]
+            return tuple(future.result() for future in futures)
+    #end function
 
-        raise ImageGeneratorUtils.Error(
-            "unable to determine target release."
-        )
+    @staticmethod
+    def determine_target_release(sysroot):
+        ImageGeneratorUtils.raise_unless_sysroot_exists(sysroot)
+        return ImageGeneratorUtils._read_target_release(sysroot)
     #end function
 
     @staticmethod
     def determine_target_libc(sysroot):
         ImageGeneratorUtils.raise_unless_sysroot_exists(sysroot)
-
-        musl_libc_list = sysroot + "/var/lib/opkg/info/musl-libc.list"
-        if os.path.exists(musl_libc_list):
-            return "musl"
-
-        return "glibc"
+        return ImageGeneratorUtils._read_target_libc(sysroot)
     #end function
 
     @staticmethod
     def determine_target_arch(sysroot):
         ImageGeneratorUtils.raise_unless_sysroot_exists(sysroot)
-
-        arch_conf = sysroot + "/etc/opkg/arch.conf"
-
-        if os.path.exists(arch_conf):
-            with open(arch_conf, "r", encoding="utf-8") as f:
-                for line in f:
-                    m = re.match(r"^\s*arch\s+(?P<arch>\S+)\s+\d+\s*$", line)
-                    if m:
-                        if m.group("arch") not in ["all", "tools"]:
-                            return m.group("arch")
-                #end for
-            #end with
-        #end if
-
-        raise ImageGeneratorUtils.Error(
-            "unable to determine target architecture."
-        )
+        return ImageGeneratorUtils._read_target_arch(sysroot)
     #end function
 
     @staticmethod
     def raise_unless_valid_script_identifier(scriptname):
-        if not re.match(r"^[-a-zA-Z0-9_.]+$", scriptname):
+        if not ImageGeneratorUtils.SCRIPT_IDENTIFIER_REGEX.match(scriptname):
             raise ImageGeneratorUtils.InvalidScriptIdentifier(
                 "invalid identifier: {}".format(scriptname)
             )
@@ -158,94 +150,131 @@ class ImageGeneratorUtils:
     def find_internal_specs(specname, release, libc, arch):
         ImageGeneratorUtils.raise_unless_valid_script_identifier(specname)
 
-        basedir = os.path.join(
-            os.path.dirname(os.path.realpath(__file__)), "customize"
+        index = ImageGeneratorUtils._index_scripts(
+            ImageGeneratorUtils.CUSTOMIZE_DIR, release, libc, arch
         )
 
-        specfiles = []
-
-        for subdir_template in ImageGeneratorUtils.DIR_TEMPLATES:
-            subdir = subdir_template.format(
-                release=release, libc=libc, arch=arch
-            )
-
-            candidate_specfile = basedir + subdir + os.sep + specname
-            if os.path.isfile(candidate_specfile):
-                specfiles.append(candidate_specfile)
-        #end for
-
-        return specfiles
+        return list(index.get(specname, []))
     #end function
 
     @staticmethod
     def list_internal_specs(release, libc, arch):
-        basedir = os.path.join(
-            os.path.dirname(os.path.realpath(__file__)), "customize"
+        index = ImageGeneratorUtils._index_scripts(
+            ImageGeneratorUtils.CUSTOMIZE_DIR, release, libc, arch
         )
 
-        specfiles = set()
-
-        for subdir_template in ImageGeneratorUtils.DIR_TEMPLATES:
-            subdir = subdir_template.format(
-                release=release, libc=libc, arch=arch
-            )
-
-            specfile_dir = basedir + subdir
-            if not os.path.isdir(specfile_dir):
-                continue
-
-            for entry in os.listdir(specfile_dir):
-                if os.path.isfile(specfile_dir + os.sep + entry):
-                    specfiles.add(entry)
-        #end for
-
-        return list(sorted(specfiles))
+        return list(sorted(index))
     #end function
 
     @staticmethod
     def find_package_script(format_, release, libc, arch):
         ImageGeneratorUtils.raise_unless_valid_script_identifier(format_)
 
-        basedir = os.path.join(
-            os.path.dirname(os.path.realpath(__file__)), "package"
+        index = ImageGeneratorUtils._index_scripts(
+            ImageGeneratorUtils.PACKAGE_DIR, release, libc, arch
         )
 
-        for subdir_template in reversed(ImageGeneratorUtils.DIR_TEMPLATES):
-            subdir = subdir_template.format(
-                release=release, libc=libc, arch=arch
-            )
-
-            package_script = basedir + subdir + os.sep + format_
-            if os.path.isfile(package_script):
-                return package_script
-        #end for
+        # The most specific match wins.
+        candidates = index.get(format_)
+        if candidates:
+            return candidates[-1]
 
         return None
     #end function
 
     @staticmethod
     def list_package_scripts(release, libc, arch):
-        basedir = os.path.join(
-            os.path.dirname(os.path.realpath(__file__)), "package"
+        index = ImageGeneratorUtils._index_scripts(
+            ImageGeneratorUtils.PACKAGE_DIR, release, libc, arch
         )
 
-        package_scripts = set()
+        return list(sorted(index))
+    #end function
+
+    @staticmethod
+    @functools.lru_cache(maxsize=32)
+    def _index_scripts(basedir, release, libc, arch):
+        # Maps script names to their paths, from least to most specific.
+        index = {}
 
-        for subdir_template in reversed(ImageGeneratorUtils.DIR_TEMPLATES):
-            subdir = subdir_template.format(
+        for subdir_template in ImageGeneratorUtils.DIR_TEMPLATES:
+            subdir = basedir + subdir_template.format(
                 release=release, libc=libc, arch=arch
             )
 
-            script_dir = basedir + subdir
-            if not os.path.isdir(script_dir):
+            try:
+                with os.scandir(subdir) as it:
+                    for entry in it:
+                        if entry.is_file():
+                            index.setdefault(entry.name, []).append(
+                                entry.path
+                            )
+                #end with
+            except (FileNotFoundError, NotADirectoryError):
                 continue
-
-            for entry in os.listdir(script_dir):
-                if os.path.isfile(script_dir + os.sep + entry):
-                    package_scripts.add(entry)
         #end for
 
-        return list(sorted(package_scripts))
+        return {name: tuple(paths) for name, paths in index.items()}
+    #end function
+
+    @staticmethod
+    def _read_target_release(sysroot):
+        os_release = sysroot + "/etc/os-release"
+
+        try:
+            with open(os_release, "r", encoding="utf-8") as f:
+                for line in f:
+                    key, sep, value = line.strip().partition("=")
+                    if not sep or key.rstrip() != "VERSION_CODENAME":
+                        continue
+
+                    release = value.strip().strip("\"'")
+                    if release:
+                        return release
+                #end for
+            #end with
+        except FileNotFoundError:
+            pass
+        #end try
+
+        raise ImageGeneratorUtils.Error(
+            "unable to determine target release."
+        )
+    #end function
+
+    @staticmethod
+    def _read_target_libc(sysroot):
+        musl_libc_list = sysroot + "/var/lib/opkg/info/musl-libc.list"
+        if os.path.exists(musl_libc_list):
+            return "musl"
+
+        return "glibc"
+    #end function
+
+    @staticmethod
+    def _read_target_arch(sysroot):
+        arch_conf = sysroot + "/etc/opkg/arch.conf"
+
+        try:
+            with open(arch_conf, "r", encoding="utf-8") as f:
+                for line in f:
+                    fields = line.split()
+                    if len(fields) != 3 or fields[0] != "arch" or \
+                            not fields[2].isdigit():
+                        continue
+
+                    arch = fields[1]
+                    if arch not in ImageGeneratorUtils.NON_TARGET_ARCHS:
+                        return arch
+                #end for
+            #end with
+        except FileNotFoundError:
+            pass
+        #end try
+
+        raise ImageGeneratorUtils.Error(
+            "unable to determine target architecture."
+        )
     #end function
 
 #end class
@@ -24,10 +24,12 @@
 #
 
 import contextlib
+import copy
 import fcntl
+import functools
 import os
 import json
-import base64
+import secrets
 
 from yaybondi.error import BondiError
 from yaybondi.miscellaneous.userinfo import UserInfo
@@ -47,6 +49,8 @@ class AppConfig:
     }
 }"""  # noqa
 
+    DEFAULT_CONFIG_DICT = json.loads(DEFAULT_CONFIG)
+
     def __init__(self):
         self.config = self.load_user_config()
 
@@ -69,42 +73,40 @@ class AppConfig:
         return self.config.get(key, default)
 
     def load_user_config(self):
-        config = None
-
-        user_config_file = os.path.join(
-            UserInfo.config_folder(), "config.json"
-        )
-
-        if os.path.exists(user_config_file):
-            with open(user_config_file, "r", encoding="utf-8") as f, \
-                    self._lock_file(f) as f:
-                config = json.load(f)
-        else:
-            config = self.create_default_user_config()
+        try:
+            f = open(AppConfig._user_config_file(), "r", encoding="utf-8")
+        except FileNotFoundError:
+            return self.create_default_user_config()
 
-        return config
+        with f, self._lock_file(f) as f:
+            return json.load(f)
     #end function
 
     def create_default_user_config(self):
-        user_config_dir  = UserInfo.config_folder()
-        user_config_file = os.path.join(user_config_dir, "config.json")
+        user_config_file = AppConfig._user_config_file()
+        user_config_dir  = os.path.dirname(user_config_file)
 
-        default_config = json.loads(AppConfig.DEFAULT_CONFIG)
+        default_config = copy.deepcopy(AppConfig.DEFAULT_CONFIG_DICT)
         default_config["maintainer-info"] = UserInfo.maintainer_info()
 
         for app in default_config.get("apps", {}).values():
-            secret_key = base64.encodebytes(os.urandom(32)).decode("utf-8")
+            secret_key = secrets.token_urlsafe(32)
             app\
                 .setdefault("appconfig", {})\
                 .setdefault("SECRET_KEY", secret_key)
         #end for
 
+        payload = json.dumps(default_config, ensure_ascii=False, indent=4)\
+            .encode("utf-8")
+
         try:
             os.makedirs(user_config_dir, exist_ok=True)
-            with open(user_config_file, "w", encoding="utf-8") as f, \
-                    self._lock_file(f) as f:
+            fd = os.open(user_config_file,
+                os.O_WRONLY | os.O_CREAT | os.O_CLOEXEC, 0o0600)
+            with open(fd, "wb") as f, self._lock_file(f) as f:
                 os.fchmod(f.fileno(), 0o0600)
-                json.dump(default_config, f, ensure_ascii=False, indent=4)
+                os.ftruncate(f.fileno(), 0)
+                f.write(payload)
         except Exception as e:
             raise BondiError(
                 "failed to store '{}': {}".format(user_config_file, str(e))
@@ -113,4 +115,10 @@ class AppConfig:
         return default_config
     #end function
 
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _user_config_file():
+        return os.path.join(UserInfo.config_folder(), "config.json")
+    #end function
+
 #end class
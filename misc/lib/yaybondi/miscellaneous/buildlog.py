@@ -13,45 +13,119 @@ from yaybondi.miscellaneous.workerthread import WorkerThread
 
 class BuildLog:
 
+    __slots__ = (
+        "_logfile",
+        "_preserve",
+        "_logfilefd",
+        "_stdout_orig",
+        "_stdout_read",
+        "_stdout_write",
+        "_stderr_orig",
+        "_stderr_read",
+        "_stderr_write",
+        "_log_shovel",
+        "_callbacks",
+    )
+
     class Error(BondiError):
         pass
 
     class LogForwarder(WorkerThread):
 
+        # Keep one busy pipe from starving the other and bound the batch.
+        MAX_READS_PER_WAKEUP = 64
+
         def __init__(self, stdout_read, stderr_read, stdout_write,
                 stderr_write, logfilefd, callbacks):
             super().__init__(name="log-shovel", interval=30.0)
 
+            try:
+                iov_max = os.sysconf("SC_IOV_MAX")
+            except (ValueError, OSError):
+                iov_max = -1
+            self._iov_max = iov_max if iov_max > 0 else 1024
+
             self._stdout_read  = stdout_read
             self._stdout_write = stdout_write
             self._stderr_read  = stderr_read
             self._stderr_write = stderr_write
             self._logfilefd    = logfilefd
             self._callbacks    = callbacks
+            self._wake_w       = None
         #end function
 
         def work(self):
-            p = select.poll()
+            ep = select.epoll()
+
+            # Used by stop() to interrupt the otherwise unbounded wait.
+            wake_r, self._wake_w = os.pipe()
+            ep.register(wake_r, select.EPOLLIN)
 
-            if self._stdout_read:
-                os.set_blocking(self._stdout_read, False)
-                p.register(self._stdout_read, select.POLLIN)
+            read_fds = []
 
-            if self._stderr_read:
-                os.set_blocking(self._stderr_read, False)
-                p.register(self._stderr_read, select.POLLIN)
+            for fd in [self._stdout_read, self._stderr_read]:
+                if fd:
+                    os.set_blocking(fd, False)
+                    ep.register(fd, select.EPOLLIN)
+                    read_fds.append(fd)
+            #end for
+
+            try:
+                while not self._stop_event.is_set():
+                    self._forward(ep, [
+                        fd for fd, _ in ep.poll() if fd != wake_r
+                    ])
+                #end while
+
+                # Pick up output that was written just before stopping.
+                while self._forward(ep, read_fds):
+                    pass
+            finally:
+                wake_w, self._wake_w = self._wake_w, None
+                ep.close()
+                os.close(wake_r)
+                os.close(wake_w)
+            #end try
+
+            for fd in [self._stdout_read, self._stderr_read, self._logfilefd]:
+                try:
+                    if fd is not None:
+                        os.close(fd)
+                except OSError:
+                    pass
+            #end for
+        #end function
 
-            while not self._stop_event.is_set():
-                fds = p.poll(500)
+        def stop(self, *args, **kwargs):
+            super().stop(*args, **kwargs)
 
-                for fd, _ in fds:
+            wake_w = self._wake_w
+            if wake_w is not None:
+                try:
+                    os.write(wake_w, b"x")
+                except OSError:
+                    pass
+            #end if
+        #end function
+
+        def _forward(self, ep, fds):
+            log_chunks = []
+            more_data  = False
+
+            for fd in fds:
+                for _ in range(BuildLog.LogForwarder.MAX_READS_PER_WAKEUP):
                     try:
-                        bytes_ = os.read(fd, 4096)
+                        bytes_ = os.read(fd, 65536)
                     except OSError:
-                        continue
+                        break
 
                     if not bytes_:
-                        continue
+                        try:
+                            ep.unregister(fd)
+                        except OSError:
+                            pass
+                        break
+                    #end if
 
                     if fd == self._stderr_read:
                         if self._stderr_write:
@@ -65,21 +139,26 @@ class BuildLog:
                             os.write(self._stderr_write, bytes_)
                     #end if
 
-                    if self._logfilefd:
-                        os.write(self._logfilefd, bytes_)
+                    log_chunks.append(bytes_)
+                    if len(log_chunks) >= self._iov_max:
+                        self._write_log(log_chunks)
 
                     for cb in self._callbacks:
                         cb(bytes_)
+                else:
+                    # fd is still readable, epoll reports it again
+                    more_data = True
                 #end for
-            #end while
-
-            for fd in [self._stdout_read, self._stderr_read, self._logfilefd]:
-                try:
-                    if fd is not None:
-                        os.close(fd)
-                except OSError:
-                    pass
             #end for
+
+            self._write_log(log_chunks)
+            return more_data
+        #end function
+
+        def _write_log(self, log_chunks):
+            if self._logfilefd and log_chunks:
+                os.writev(self._logfilefd, log_chunks)
+            log_chunks.clear()
         #end function
 
         def __enter__(self):
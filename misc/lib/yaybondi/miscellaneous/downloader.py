@@ -26,6 +26,10 @@
 import hashlib
 import os
 import random
+import re
+import secrets
+import shutil
+import stat
 import string
 import tempfile
 import urllib.request
@@ -37,6 +41,11 @@ class DownloadError(BondiError):
 
 class Downloader:
 
+    CHUNK_SIZE = 1024 * 1024
+
+    TAG_MAX_LENGTH = 32
+    TAG_REGEX = re.compile(r"^[a-zA-Z0-9][-a-zA-Z0-9_.]*$")
+
     def __init__(self, progress_bar_class=None):
         self._progress_bar_class = progress_bar_class
 
@@ -69,6 +78,42 @@ class Downloader:
             )
     #end function
 
+    def download_to_file(self, url, fileobj, digest=None,
+            connection_timeout=30):
+        progress_bar = None
+        bytes_read   = 0
+
+        try:
+            with urllib.request.urlopen(url, timeout=connection_timeout)\
+                    as response:
+                if self._progress_bar_class and response.length:
+                    progress_bar = self._progress_bar_class(response.length)
+                    progress_bar(0)
+                #end if
+
+                read  = response.read
+                write = fileobj.write
+
+                while True:
+                    chunk = read(self.CHUNK_SIZE)
+                    if not chunk:
+                        break
+
+                    write(chunk)
+                    bytes_read += len(chunk)
+
+                    if digest is not None:
+                        digest.update(chunk)
+                    if progress_bar:
+                        progress_bar(bytes_read)
+                #end while
+            #end with
+        except Exception as e:
+            raise DownloadError(
+                'error retrieving "{}": {}'.format(url, str(e))
+            )
+    #end function
+
     def source_changed(self, url, old_tag, connection_timeout=30):
         new_tag = self.tag(
             url, connection_timeout=connection_timeout
@@ -110,34 +155,38 @@ class Downloader:
         directory = os.path.dirname(os.path.realpath(symlink))
         blob_file = os.path.join(directory, tag)
 
-        with tempfile.NamedTemporaryFile(prefix=".download-", dir=directory,
-                delete=False) as f:
+        f, tmp_name = self._open_blob_file(directory)
+
+        with f:
             try:
-                it = self.get(
+                self.download_to_file(
                     url,
+                    f,
                     digest=digest,
                     connection_timeout=connection_timeout
                 )
 
-                for chunk in it:
-                    f.write(chunk)
-
                 # Fix permissions
                 if permissions is not None:
                     os.fchmod(f.fileno(), permissions)
+                # Link anonymous file into place only once it is complete.
+                if tmp_name is None:
+                    tmp_name = self._link_blob_file(f, directory)
                 # Atomically rename blob.
-                os.rename(f.name, blob_file)
+                os.rename(tmp_name, blob_file)
                 # Create temporary symlink to new blob reusing tempfile name.
-                os.symlink(os.path.basename(blob_file), f.name)
+                os.symlink(os.path.basename(blob_file), tmp_name)
                 # Atomically rename symlink (hopefully).
-                os.rename(f.name, symlink)
+                os.rename(tmp_name, symlink)
             except Exception as e:
-                if os.path.exists(f.name) or os.path.islink(f.name):
-                    os.unlink(f.name)
+                if tmp_name is not None and os.path.lexists(tmp_name):
+                    os.unlink(tmp_name)
                 if os.path.exists(blob_file):
                     if os.path.islink(symlink) and \
                             os.path.basename(os.readlink(symlink)) != tag:
                         os.unlink(blob_file)
+                if isinstance(e, DownloadError):
+                    raise
                 raise DownloadError(
                     'error retrieving "{}": {}'.format(url, str(e))
                 )
@@ -165,6 +214,16 @@ class Downloader:
                 "error generating etag for '{}': {}".format(url, str(e))
             )
 
+        # Most servers send a short, filename-safe ETag, which identifies
+        # the resource version by itself and can be used as the tag as is.
+        etag = identifier1.strip()
+        if etag.startswith("W/"):
+            etag = etag[2:]
+        etag = etag.strip('"')
+
+        if len(etag) <= self.TAG_MAX_LENGTH and self.TAG_REGEX.match(etag):
+            return etag
+
         sha256 = hashlib.sha256()
         sha256.update(identifier1.encode("utf-8"))
         sha256.update(identifier2.encode("utf-8"))
@@ -172,4 +231,62 @@ class Downloader:
         return sha256.hexdigest()[:16]
     #end function
 
+    @classmethod
+    def hash_file(cls, path, algo="sha256"):
+        with open(path, "rb") as f:
+            # Python 3.11+ runs the read and update loop in C.
+            if hasattr(hashlib, "file_digest"):
+                return hashlib.file_digest(f, algo).hexdigest()
+
+            h = hashlib.new(algo)
+            for chunk in iter(lambda: f.read(cls.CHUNK_SIZE), b""):
+                h.update(chunk)
+            return h.hexdigest()
+        #end with
+    #end function
+
+    # HELPERS
+
+    def _open_blob_file(self, directory):
+        # Prefer an unnamed file, which leaves nothing behind if the process
+        # dies mid-download. Not all kernels and file systems support it.
+        try:
+            fd = os.open(
+                directory, os.O_RDWR | os.O_TMPFILE | os.O_CLOEXEC, 0o600
+            )
+        except (AttributeError, OSError):
+            f = tempfile.NamedTemporaryFile(
+                prefix=".download-", dir=directory, delete=False
+            )
+            return f, f.name
+        #end try
+
+        return open(fd, "w+b"), None
+    #end function
+
+    def _link_blob_file(self, f, directory):
+        f.flush()
+
+        tmp_name = os.path.join(directory, ".download-" + secrets.token_hex(4))
+        try:
+            os.link("/proc/self/fd/{}".format(f.fileno()), tmp_name)
+        except OSError:
+            # Without /proc, or when the kernel refuses, fall back to a copy.
+            try:
+                with open(tmp_name, "xb") as tmp_file:
+                    f.seek(0)
+                    shutil.copyfileobj(f, tmp_file, self.CHUNK_SIZE)
+                    os.fchmod(tmp_file.fileno(),
+                        stat.S_IMODE(os.fstat(f.fileno()).st_mode))
+                #end with
+            except Exception:
+                if os.path.lexists(tmp_name):
+                    os.unlink(tmp_name)
+                raise
+            #end try
+        #end try
+
+        return tmp_name
+    #end function
+
 #end class
@@ -37,40 +37,33 @@ class LogFormatter(logging.Formatter):
     ESC_BOLD   = '\033[1m'
     ESC_ENDC   = '\033[0m'
 
+    LEVEL_TO_EASCII = {
+        logging.DEBUG:    ESC_BLUE,
+        logging.INFO:     ESC_GREEN,
+        logging.WARNING:  ESC_YELLOW,
+        logging.ERROR:    ESC_RED,
+        logging.CRITICAL: ESC_RED
+    }
+
+    # Handlers handed out by configure, one per (style, app_name).
+    _handlers = {}
+
     def __init__(self, app_name):
         self._app_name = app_name
-        self._stdout_isatty = sys.stdout.isatty()
+        self.refresh_tty()
 
     def set_app_name(self, app_name):
         self._app_name = app_name
 
-    def format(self, record):
-        if self._stdout_isatty:
-            template = "{ebold_}{appname}{eendc_}: "\
-                       "{ebold_}{elevl_}{levelname}{eendc_}: {message}"
-        else:
-            template = "{appname}: {levelname}: {message}"
-
-        level_to_eascii = {
-            logging.DEBUG: self.ESC_BLUE,
-            logging.INFO: self.ESC_GREEN,
-            logging.WARNING: self.ESC_YELLOW,
-            logging.ERROR: self.ESC_RED,
-            logging.CRITICAL: self.ESC_RED
-        }
-
-        message = template.format(
-            ebold_=self.ESC_BOLD,
-            eendc_=self.ESC_ENDC,
-            elevl_=level_to_eascii[record.levelno],
-            appname=self._app_name,
-            levelname=record.levelname.lower(),
-            message=record.getMessage()
-        )
-
-        return message
+    def refresh_tty(self):
+        self._stdout_isatty = sys.stdout.isatty()
+        self._format_record = self._format_tty if self._stdout_isatty \
+            else self._format_plain
     #end function
 
+    def format(self, record):
+        return self._format_record(record)
+
     @staticmethod
     def configure(logger, style, app_name):
         if style not in ["cli", "plain"]:
@@ -78,14 +71,36 @@ class LogFormatter(logging.Formatter):
                 'invalid logging style "{}".'.format(style)
             )
 
-        logger.handlers.clear()
-        handler = logging.StreamHandler()
+        key = (style, app_name)
 
-        if style == "cli":
-            handler.setFormatter(LogFormatter(app_name))
+        handler = LogFormatter._handlers.get(key)
+        if handler is None:
+            handler = logging.StreamHandler()
+            if style == "cli":
+                handler.setFormatter(LogFormatter(app_name))
+            LogFormatter._handlers[key] = handler
+        #end if
 
+        logger.handlers.clear()
         logger.addHandler(handler)
         logger.setLevel(logging.INFO)
     #end function
 
+    # HELPERS
+
+    def _format_tty(self, record):
+        ebold_ = self.ESC_BOLD
+        eendc_ = self.ESC_ENDC
+        elevl_ = self.LEVEL_TO_EASCII[record.levelno]
+
+        return f"{ebold_}{self._app_name}{eendc_}: " \
+            f"{ebold_}{elevl_}{record.levelname.lower()}{eendc_}: " \
+            f"{record.getMessage()}"
+    #end function
+
+    def _format_plain(self, record):
+        return f"{self._app_name}: {record.levelname.lower()}: " \
+            f"{record.getMessage()}"
+    #end function
+
 #end class
@@ -23,12 +23,13 @@
 # THE SOFTWARE.
 #
 
-import os
+import shutil
 from yaybondi.miscellaneous.xpkg import Dpkg, Opkg  # noqa:
 
 class PackageManager:
 
     pm_instance = None
+    pm_class    = None
 
     @classmethod
     def instance(klass):
@@ -42,12 +43,14 @@ class PackageManager:
 
     @classmethod
     def system_package_manager(klass):
+        if PackageManager.pm_class:
+            return PackageManager.pm_class
+
         for executable in ["dpkg", "opkg"]:
-            for search_dir in os.environ.get("PATH", "").split(os.pathsep):
-                if os.path.exists(os.path.join(search_dir, executable)):
-                    return globals()[executable.capitalize()]
-                #end if
-            #end for
+            if shutil.which(executable):
+                PackageManager.pm_class = globals()[executable.capitalize()]
+                return PackageManager.pm_class
+            #end if
         #end for
 
         msg = "system uses unknown or unsupported package manager."
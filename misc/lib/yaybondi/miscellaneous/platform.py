@@ -23,10 +23,13 @@
 # THE SOFTWARE.
 #
 
+import functools
 import locale
 import os
 import re
+import shutil
 import subprocess
+import sys
 
 from yaybondi.error import BondiError
 from yaybondi.miscellaneous.packagemanager import PackageManager
@@ -37,9 +40,58 @@ class Platform:
     LIBC_NAME_FILE         = "/usr/share/misc/libc.name"
     OPKG_MUSL_CONTROL_FILE = "/var/lib/opkg/info/musl-libc.control"
 
+    # Nothing calls setlocale, this is fixed for the lifetime of the process.
+    PREFERRED_ENCODING = locale.getpreferredencoding(False)
+
+    EXTRA_BIN_DIRS = [
+        "/tools/bin",
+        "/tools/sbin",
+        "/usr/local/bin",
+        "/usr/local/sbin",
+        "/bin",
+        "/sbin",
+        "/usr/bin",
+        "/usr/sbin"
+    ]
+
+    _executable_cache = {}
+    _key_value_file_cache = {}
+
+    CONFIG_GUESS_REGEX = re.compile(r"^([^-]+)(?:-([^-]+))?-([^-]+)-([^-]+)$")
+    I386_REGEX         = re.compile(r"^i\d86.*$")
+    MIPSEL_REGEX       = re.compile(r"^mips\d*el.*$")
+    PPC64LE_REGEX      = re.compile(r"^(?:powerpc64|ppc64)(?:le|el).*$")
+    X86_64_REGEX       = re.compile(r"^x86[-_]64$")
+
+    DEBUG_PREFIX_MAP_REGEX = re.compile(r"\s*-fdebug-prefix-map=\S+\s*")
+
+    # Checked in order, plain strings (or tuples of them) are prefixes.
+    MACHINE_TARGET_TEMPLATES = [
+        ("aarch64",            "aarch64-linux-{}"),
+        ("armv4t",             "armv4-linux-{}eabi"),
+        ("armv6",              "armv6-linux-{}eabihf"),
+        ("armv7a",             "armv7a-linux-{}eabihf"),
+        (I386_REGEX,           "i686-linux-{}"),
+        ("mips64el",           "mips64el-linux-{}"),
+        (MIPSEL_REGEX,         "mipsel-linux-{}"),
+        (PPC64LE_REGEX,        "powerpc64le-linux-{}"),
+        (("powerpc", "ppc"),   "powerpc-linux-{}"),
+        ("s390x",              "s390x-linux-{}"),
+        ("riscv64",            "riscv64-linux-{}"),
+        (X86_64_REGEX,         "x86_64-linux-{}"),
+    ]
+
+    # Shortcut for the usual machine names, must agree with the table above.
+    MACHINE_TARGET_EXACT = {
+        "aarch64": "aarch64-linux-{}",
+        "armv7a":  "armv7a-linux-{}eabihf",
+        "i686":    "i686-linux-{}",
+        "x86_64":  "x86_64-linux-{}",
+    }
+
     @staticmethod
     def config_guess():
-        preferred_encoding = locale.getpreferredencoding(False)
+        preferred_encoding = Platform.PREFERRED_ENCODING
         gcc = Platform.find_executable("gcc")
 
         if gcc:
@@ -58,7 +110,7 @@ class Platform:
                             .stdout\
                             .decode(preferred_encoding)\
                             .strip()
-            m = re.match(r"^([^-]+)(?:-([^-]+))?-([^-]+)-([^-]+)$", result)
+            m = Platform.CONFIG_GUESS_REGEX.match(result)
             if m:
                 arch, platform, libc = m.group(1, 3, 4)
                 return "-".join([arch, platform, libc])
@@ -69,31 +121,42 @@ class Platform:
 
     @staticmethod
     def find_executable(executable_name, fallback=None):
-        search_path = os.environ.get("PATH", "").split(os.pathsep) + [
-            "/tools/bin",
-            "/tools/sbin",
-            "/usr/local/bin",
-            "/usr/local/sbin",
-            "/bin",
-            "/sbin",
-            "/usr/bin",
-            "/usr/sbin"
-        ]
-
-        for path in search_path:
-            location = os.path.join(path, executable_name)
-            if os.path.exists(location):
-                return location
+        key = (executable_name, os.environ.get("PATH", ""))
+
+        # Only hits are remembered, the tool may still get installed.
+        location = Platform._executable_cache.get(key)
+        if not location:
+            location = Platform._find_executable(*key)
+            if not location:
+                return fallback
+            Platform._executable_cache[key] = location
+        #end if
+
+        return location
+    #end function
+
+    @staticmethod
+    def cache_clear():
+        for func in [
+            Platform.uname,
+            Platform.target_for_machine,
+            Platform.kernel_name,
+            Platform.machine_name,
+            Platform.libc_name,
+            Platform.libc_vendor,
+        ]:
+            func.cache_clear()
         #end for
 
-        return fallback
+        Platform._executable_cache.clear()
+        Platform._key_value_file_cache.clear()
     #end function
 
     @staticmethod
     def build_flags():
         build_flags = {}
 
-        if "linux" in Platform.kernel_name().lower() and \
+        if sys.platform.startswith("linux") and \
                 os.path.exists("/etc/debian_version"):
             return Platform._dpkg_build_flags()
 
@@ -110,6 +173,7 @@ class Platform:
     #end function
 
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def uname(*args):
         uname = Platform.find_executable("uname")
         if not uname:
@@ -120,40 +184,28 @@ class Platform:
             stdout=subprocess.PIPE,
             stderr=subprocess.DEVNULL,
         ).stdout \
-         .decode(locale.getpreferredencoding(False)) \
+         .decode(Platform.PREFERRED_ENCODING) \
          .strip()
     #end function
 
     @staticmethod
+    @functools.lru_cache(maxsize=32)
     def target_for_machine(machine, libc):
         vendor = "musl" if libc == "musl" else "gnu"
 
-        template = None
-
-        if machine.startswith("aarch64"):
-            template = "aarch64-linux-{}"
-        elif machine.startswith("armv4t"):
-            template = "armv4-linux-{}eabi"
-        elif machine.startswith("armv6"):
-            template = "armv6-linux-{}eabihf"
-        elif machine.startswith("armv7a"):
-            template = "armv7a-linux-{}eabihf"
-        elif re.match(r"^i\d86.*$", machine):
-            template = "i686-linux-{}"
-        elif machine.startswith("mips64el"):
-            template = "mips64el-linux-{}"
-        elif re.match(r"^mips\d*el.*$", machine):
-            template = "mipsel-linux-{}"
-        elif re.match(r"^(?:powerpc64|ppc64)(?:le|el).*$", machine):
-            template = "powerpc64le-linux-{}"
-        elif machine.startswith("powerpc") or machine.startswith("ppc"):
-            template = "powerpc-linux-{}"
-        elif machine.startswith("s390x"):
-            template = "s390x-linux-{}"
-        elif machine.startswith("riscv64"):
-            template = "riscv64-linux-{}"
-        elif re.match(r"^x86[-_]64$", machine):
-            template = "x86_64-linux-{}"
+        template = Platform.MACHINE_TARGET_EXACT.get(machine)
+
+        if not template:
+            for key, candidate in Platform.MACHINE_TARGET_TEMPLATES:
+                if isinstance(key, (str, tuple)):
+                    if machine.startswith(key):
+                        template = candidate
+                        break
+                elif key.match(machine):
+                    template = candidate
+                    break
+            #end for
+        #end if
 
         if not template:
             raise BondiError(
@@ -165,10 +217,12 @@ class Platform:
     #end function
 
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def kernel_name():
         return Platform.uname("-s")
 
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def machine_name():
         return Platform \
             .target_for_machine(Platform.uname("-m"), "musl") \
@@ -187,6 +241,7 @@ class Platform:
     #end function
 
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def libc_name():
         result = "glibc"
 
@@ -200,6 +255,7 @@ class Platform:
     #end function
 
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def libc_vendor():
         result = Platform.libc_name()
         if result == "glibc":
@@ -261,22 +317,41 @@ class Platform:
 
     # HELPERS
 
+    @staticmethod
+    def _find_executable(executable_name, search_path):
+        search_path = os.pathsep.join([search_path, *Platform.EXTRA_BIN_DIRS])
+        return shutil.which(executable_name, path=search_path)
+    #end function
+
     @staticmethod
     def _key_value_file_lookup(attr_name, filename="/etc/target"):
-        if os.path.exists(filename):
+        try:
+            st = os.stat(filename)
+        except OSError:
+            return None
+
+        # Each file is parsed once and reparsed only when it changes.
+        stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+        cached = Platform._key_value_file_cache.get(filename)
+
+        if cached is None or cached[0] != stamp:
+            entries = {}
+
             with open(filename, "r", encoding="utf-8") as fp:
                 for line in fp:
                     try:
                         k, v = [x.strip() for x in line.split("=", 1)]
                     except ValueError:
                         continue
-                    if k == attr_name:
-                        return v
+                    entries.setdefault(k, v)
                 #end for
             #end with
+
+            cached = Platform._key_value_file_cache[filename] = \
+                (stamp, entries)
         #end if
 
-        return None
+        return cached[1].get(attr_name)
     #end function
 
     @staticmethod
@@ -287,22 +362,20 @@ class Platform:
         if not dpkg_buildflags:
             return build_flags
 
-        preferred_encoding = locale.getpreferredencoding(False)
+        preferred_encoding = Platform.PREFERRED_ENCODING
 
-        for flag in subprocess.run([dpkg_buildflags, "--list"],
+        # One FLAG=value line per flag, saves a fork per --get.
+        for line in subprocess.run([dpkg_buildflags, "--dump"],
                 stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)\
                         .stdout.decode(preferred_encoding).splitlines():
+            flag, sep, value = line.partition("=")
             flag = flag.strip()
 
-            if not flag:
+            if not (flag and sep):
                 continue
 
-            value = subprocess.run([dpkg_buildflags, "--get", flag],
-                    stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)\
-                            .stdout.decode(preferred_encoding).strip()
-
-            value = re.sub(r"\s*-fdebug-prefix-map=\S+\s*", " ", value)
-            build_flags[flag] = value
+            build_flags[flag] = \
+                Platform.DEBUG_PREFIX_MAP_REGEX.sub(" ", value.strip())
         #end for
 
         return build_flags
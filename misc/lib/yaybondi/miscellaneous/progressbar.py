@@ -27,37 +27,49 @@ import sys
 
 class ProgressBar:
 
-    def __init__(self, total_size, out_file=sys.stdout):
+    def __init__(self, total_size, out_file=sys.stdout, total_bars=60):
         self._out_file = out_file
         self._total    = total_size
         self._isatty   = self._out_file.isatty()
         self._lastval  = -1
         self._total_reached = False
+
+        # Amount needed for the percentage to advance by one.
+        self._step = max(1, total_size // 100)
+        self._last_amount = -self._step
+
+        # One pre-rendered line per percent value below 100.
+        self._lines = []
+        for percent in range(100):
+            num_bars = percent * total_bars // 100
+            self._lines.append(
+                "[" + "#" * num_bars + " " * (total_bars - num_bars) + "]" +
+                " %i%%\r" % percent
+            )
+        #end for
+
+        self._full_bar = "[" + "#" * total_bars + "]"
     #end function
 
-    def __call__(self, amount, total_bars=60):
-        if self._total_reached:
+    def __call__(self, amount):
+        if self._total_reached or not self._isatty:
+            return
+        if amount - self._last_amount < self._step and amount < self._total:
             return
 
-        percent = 100 if self._total == 0 else \
-                    int(amount * 100.0 / self._total)
+        percent = 100 if self._total == 0 else amount * 100 // self._total
 
         if percent == self._lastval:
             return
 
-        num_bars   = int(percent * total_bars / 100.0)
-        num_spaces = total_bars - num_bars
-
-        if self._isatty:
-            if amount < self._total:
-                self._out_file.write("[" + "#" * num_bars +
-                        " " * num_spaces + "] %i%%\r" % percent)
-            else:
-                self._out_file.write("[" + "#" * num_bars +
-                        " " * num_spaces + "] %i%%\n" % percent)
-        #end if
+        # Below the total the percentage is always less than 100.
+        if amount < self._total:
+            self._out_file.write(self._lines[percent])
+        else:
+            self._out_file.write(self._full_bar + " %i%%\n" % percent)
 
         self._lastval = percent
+        self._last_amount = amount
 
         if amount >= self._total:
             self._total_reached = True
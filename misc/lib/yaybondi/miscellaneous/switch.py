@@ -21,7 +21,6 @@ class switch(object):
     def __iter__(self):
         """Return the match method once, then stop"""
         yield self.match
-        raise StopIteration
     #end function
 
     def match(self, *args):
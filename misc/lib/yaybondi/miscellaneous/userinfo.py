@@ -23,6 +23,7 @@
 # THE SOFTWARE.
 #
 
+import functools
 import os
 import pwd
 import socket
@@ -30,6 +31,7 @@ import socket
 class UserInfo:
 
     @staticmethod
+    @functools.lru_cache(maxsize=1)
     def homedir():
         home = None
 
@@ -43,6 +45,7 @@ class UserInfo:
     #end function
 
     @staticmethod
+    @functools.lru_cache(maxsize=1)
     def config_folder():
         home = UserInfo.homedir()
         if not home:
@@ -51,6 +54,7 @@ class UserInfo:
     #end function
 
     @staticmethod
+    @functools.lru_cache(maxsize=1)
     def cache_dir() -> str | None:
         home = UserInfo.homedir()
         if not home:
@@ -61,9 +65,9 @@ class UserInfo:
     @staticmethod
     def maintainer_info():
         hostname = socket.gethostname()
-        useruid  = os.getuid()
-        username = pwd.getpwuid(useruid).pw_name
-        realname = pwd.getpwuid(useruid).pw_gecos.split(',')[0]
+        pw       = pwd.getpwuid(os.getuid())
+        username = pw.pw_name
+        realname = pw.pw_gecos.split(',', 1)[0]
         usermail = username + "@" + hostname
 
         return {
@@ -26,10 +26,8 @@
 import logging
 import os
 import random
-import sys
 import threading
 import time
-import traceback
 
 LOGGER = logging.getLogger(__name__)
 
@@ -39,50 +37,53 @@ class WorkerThread(threading.Thread):
         super().__init__(name=name)
         self._interval = interval
         self._stop_event = threading.Event()
+        # Runs start within +/- 10% of the interval.
+        self._jitter = (interval * 0.9, interval * 1.1)
     #end function
 
     def run(self):
-        LOGGER.debug('thread "{}" is starting up.'.format(self.name))
+        LOGGER.debug('thread "%s" is starting up.', self.name)
 
         while not self._stop_event.is_set():
-            next_start = time.time() + random.uniform(
-                self._interval * 0.9, self._interval * 1.1
-            )
+            deadline = time.monotonic() + random.uniform(*self._jitter)
 
             try:
                 self.work()
             except Exception as e:
-                _, exc_value, exc_tb = sys.exc_info()
-                frame = traceback.TracebackException(
-                    type(exc_value), exc_value, exc_tb, limit=None
-                ).stack[-1]
-
-                filename = os.path.basename(frame.filename)
-                msg = \
-                    'ACHTUNG *CRASH* in "{}", thread "{}" line "{}": ' \
-                    '{} {}'.format(
-                        filename,
+                if LOGGER.isEnabledFor(logging.ERROR):
+                    # Only the innermost frame is reported.
+                    tb = e.__traceback__
+                    while tb.tb_next is not None:
+                        tb = tb.tb_next
+
+                    LOGGER.error(
+                        'ACHTUNG *CRASH* in "%s", thread "%s" line "%s": '
+                        '%s %s',
+                        os.path.basename(tb.tb_frame.f_code.co_filename),
                         self.name,
-                        frame.lineno,
+                        tb.tb_lineno,
                         type(e).__name__,
                         e
                     )
 
-                LOGGER.error(msg)
+                    # Don't keep the failed run's frames alive while waiting.
+                    del tb
+                #end if
             #end try
 
             if self._stop_event.is_set():
                 continue
 
+            timeout = max(0.0, deadline - time.monotonic())
+
             LOGGER.warning(
-                "re-running thread {} in {:.2f}s"
-                .format(self.name, max(0.0, next_start - time.time()))
+                "re-running thread %s in %.2fs", self.name, timeout
             )
 
-            self._stop_event.wait(timeout=max(0.0, next_start - time.time()))
+            self._stop_event.wait(timeout=timeout)
         #end while
 
-        LOGGER.debug('thread "{}" is shutting down.'.format(self.name))
+        LOGGER.debug('thread "%s" is shutting down.', self.name)
     #end function
 
     def work(self):
@@ -0,0 +1,78 @@
+# -*- encoding: utf-8 -*-
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2016-2018 Tobias Koch <tobias.koch@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+import os
+import select
+import tempfile
+import unittest
+
+from unittest import mock
+
+import yaybondi.miscellaneous.buildlog as buildlog
+
+from yaybondi.miscellaneous.buildlog import BuildLog
+
+class LogForwarderTest(unittest.TestCase):
+
+    def test_forward_long_burst(self):
+        data = bytes(range(256)) * 16
+
+        read_fd, write_fd = os.pipe()
+        os.set_blocking(read_fd, False)
+        os.write(write_fd, data)
+        os.close(write_fd)
+
+        ep = select.epoll()
+        ep.register(read_fd, select.EPOLLIN)
+
+        with tempfile.TemporaryFile() as logfile:
+            forwarder = BuildLog.LogForwarder(
+                read_fd, None, None, None, logfile.fileno(), []
+            )
+
+            # one byte per read, so a single wakeup sees > 1024 reads
+            os_mock = mock.MagicMock(wraps=os)
+            os_mock.read.side_effect = lambda fd, n: os.read(fd, 1)
+
+            with mock.patch.object(buildlog, "os", os_mock):
+                wakeups = 1
+                while forwarder._forward(ep, [read_fd]):
+                    wakeups += 1
+            #end with
+
+            self.assertGreater(wakeups, 1)
+            self.assertGreater(os_mock.read.call_count, 1024)
+            for call in os_mock.writev.call_args_list:
+                self.assertLessEqual(len(call.args[1]), forwarder._iov_max)
+
+            logfile.seek(0)
+            self.assertEqual(logfile.read(), data)
+        #end with
+
+        ep.close()
+        os.close(read_fd)
+    #end function
+
+#end class
@@ -23,6 +23,9 @@
 # THE SOFTWARE.
 #
 
+import functools
+import sys
+
 from lxml import etree
 
 from yaybondi.miscellaneous.packagemanager import PackageManager
@@ -31,25 +34,51 @@ class BasePackage:
 
     class Dependency:
 
+        __slots__ = ("name", "version")
+
         def __init__(self, name, version=None):
-            self.name    = name
+            # Package names repeat across many specs, share one copy.
+            self.name    = sys.intern(name) if name is not None else None
             self.version = version
         #end function
 
         @property
         def is_fulfilled(self):
+            return BasePackage.Dependency._check(self.name, self.version)
+
+        @classmethod
+        def cache_clear(klass):
+            BasePackage.Dependency._check.cache_clear()
+
+        # The package manager loads the package database only once, so the
+        # answer for a given name and version does not change either.
+        @staticmethod
+        @functools.lru_cache(maxsize=4096)
+        def _check(name, version):
             package_manager = PackageManager.instance()
             return package_manager\
-                    .installed_version_meets_condition(self.name, self.version)
+                    .installed_version_meets_condition(name, version)
         #end function
 
     #end class
 
     class DependencySpecification:
 
+        __slots__ = ("list", "index", "_sorted", "_sorted_len")
+
+        # Shared by all from_xml calls, whitespace and ids are never used.
+        XML_PARSER = etree.XMLParser(
+            remove_blank_text=True,
+            collect_ids=False,
+            resolve_entities=False
+        )
+
         def __init__(self):
             self.list  = []
             self.index = {}
+            # Sorted view for __iter__, self.list keeps the spec order.
+            self._sorted = []
+            self._sorted_len = 0
         #end function
 
         @classmethod
@@ -59,7 +88,10 @@ class BasePackage:
             if isinstance(xml_config, etree._Element):
                 dep_node = xml_config
             elif isinstance(xml_config, str):
-                dep_node = etree.fromstring(xml_config)
+                dep_node = etree.fromstring(
+                    xml_config,
+                    parser=BasePackage.DependencySpecification.XML_PARSER
+                )
             elif not xml_config:
                 return spec
             else:
@@ -68,11 +100,11 @@ class BasePackage:
                 raise ValueError(msg)
             #end if
 
-            for node in dep_node.xpath("package|choice"):
+            for node in dep_node.iterchildren("package", "choice"):
                 alternatives = []
 
                 if node.tag == "choice":
-                    for pkg in node.xpath("package"):
+                    for pkg in node.iterchildren("package"):
                         alternatives.append(
                             BasePackage.Dependency(
                                 pkg.attrib["name"],
@@ -92,49 +124,45 @@ class BasePackage:
                 if not alternatives:
                     continue
 
-                for dep in alternatives:
-                    spec.index[dep.name] = dep
-                spec.list.append(alternatives)
+                spec.append(alternatives)
             #end for
 
             return spec
         #end function
 
         def __iter__(self):
-            self.list.sort(key=lambda x: x[0].name)
+            # Callers append to list directly, a length change means dirty.
+            if len(self.list) != self._sorted_len:
+                self._sorted = sorted(self.list, key=lambda x: x[0].name)
+                self._sorted_len = len(self.list)
+            #end if
+
+            yield from self._sorted
+        #end function
 
-            for alternatives in self.list:
-                yield alternatives
+        def append(self, alternatives):
+            self.index.update((dep.name, dep) for dep in alternatives)
+            self.list.append(alternatives)
         #end function
 
         def __getitem__(self, key):
             return self.index[key]
 
         def __setitem__(self, key, value):
-            if key not in self.index:
-                self.index[key] = value
+            size = len(self.index)
+            self.index.setdefault(key, value)
+            if len(self.index) != size:
                 self.list.append([value])
         #end function
 
         def __str__(self):
-            if not self.list:
-                return ""
-
-            dep_list = []
-            for alternatives in self.list:
-                alt_list = []
-                for alt in alternatives:
-                    if alt.version:
-                        alt_list.append("%(name)s (%(version)s)" %
-                            {"name": alt.name, "version": alt.version}
-                        )
-                    else:
-                        alt_list.append("%s" % alt.name)
-                #end for
-                dep_list.append(" | ".join(alt_list))
-            #end for
-
-            return ", ".join(dep_list)
+            return ", ".join(
+                " | ".join(
+                    f"{alt.name} ({alt.version})" if alt.version else alt.name
+                    for alt in alternatives
+                )
+                for alternatives in self.list
+            )
         #end function
     #end class
 
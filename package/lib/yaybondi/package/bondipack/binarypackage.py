@@ -23,14 +23,15 @@
 # THE SOFTWARE.
 #
 
+import concurrent.futures
 import glob
+import operator
 import os
 import re
 import stat
 import subprocess
 import textwrap
 
-from collections import OrderedDict
 from lxml import etree
 from pathlib import Path
 
@@ -43,12 +44,47 @@ from yaybondi.package.bondipack.filestats import FileStats
 from yaybondi.miscellaneous.braceexpand import braceexpand
 from yaybondi.miscellaneous.packagemanager import PackageManager
 from yaybondi.miscellaneous.platform import Platform
-from yaybondi.miscellaneous.switch import switch
 
 class BinaryPackage(BasePackage):
 
+    PREFIX_REGEX  = re.compile(r"^\$\{prefix\}")
+    VERSION_REGEX = re.compile(
+        r"^(?:(\d+):)?([-.+~a-zA-Z0-9]+?)(?:-([.~+a-zA-Z0-9]+))?$"
+    )
+    NEEDED_REGEX  = re.compile(rb"^[ \t]*NEEDED[ \t]+(\S+)", re.MULTILINE)
+
+    RELATIONS_XPATH = {
+        dep_type: etree.XPath(dep_type + "[1]") for dep_type in
+            ["requires", "provides", "conflicts", "replaces"]
+    }
+    PACKAGE_XPATH  = etree.XPath(".//package")
+    CONTENTS_XPATH = etree.XPath("contents/*")
+    SCRIPTS_XPATH  = etree.XPath("maintainer-scripts/*")
+
+    MAINTAINER_SCRIPT_HEADER = textwrap.dedent(
+
+            """\
+        #!/bin/sh -e
+
+        export BONDI_INSTALL_PREFIX="%s"
+        export BONDI_HOST_TYPE="%s"
+        export PATH="/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin"
+
+        if [ -d "/tools" ]; then
+            export PATH="/tools/sbin:/tools/bin:$PATH"
+        fi
+
+        """
+
+    )
+
     class EntryAttributes:
 
+        __slots__ = (
+            "deftype", "mode", "owner", "group", "conffile", "stats",
+            "dbg_info"
+        )
+
         def __init__(self, spec={}):
             self.deftype  = spec.get("deftype", "file")
             self.mode     = spec.get("mode")
@@ -115,13 +151,15 @@ class BinaryPackage(BasePackage):
 
         self.relations = {}
 
-        for dep_type in ["requires", "provides", "conflicts", "replaces"]:
-            dep_node = bin_node.find(dep_type)
+        for dep_type, dep_xpath in BinaryPackage.RELATIONS_XPATH.items():
+            dep_nodes = dep_xpath(bin_node)
 
-            if dep_node is None:
+            if not dep_nodes:
                 continue
 
-            for pkg_node in dep_node.findall(".//package"):
+            dep_node = dep_nodes[0]
+
+            for pkg_node in BinaryPackage.PACKAGE_XPATH(dep_node):
                 dep_version = pkg_node.get("version", "").strip()
                 dep_name    = pkg_node.get("name").strip()
 
@@ -145,10 +183,9 @@ class BinaryPackage(BasePackage):
 
         self.contents = {}
         self.content_spec = {}
-        prefix_regex = re.compile("^" + re.escape("${prefix}"))
 
-        for node in bin_node.findall('contents/*'):
-            src = prefix_regex.sub(
+        for node in BinaryPackage.CONTENTS_XPATH(bin_node):
+            src = BinaryPackage.PREFIX_REGEX.sub(
                 self.install_prefix, node.get("src").strip()
             )
 
@@ -170,24 +207,13 @@ class BinaryPackage(BasePackage):
         #end for
 
         self.maintainer_scripts = {}
-        for node in bin_node.findall("maintainer-scripts/*"):
-            if node.tag in ["preinst", "postinst", "prerm", "postrm"]:
-                self.maintainer_scripts[node.tag] = textwrap.dedent(
+        script_header = BinaryPackage.MAINTAINER_SCRIPT_HEADER % \
+            (self.install_prefix, self.host_type)
 
-                        """\
-                    #!/bin/sh -e
-
-                    export BONDI_INSTALL_PREFIX="%s"
-                    export BONDI_HOST_TYPE="%s"
-                    export PATH="/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin"
-
-                    if [ -d "/tools" ]; then
-                        export PATH="/tools/sbin:/tools/bin:$PATH"
-                    fi
-
-                    """ % (self.install_prefix, self.host_type)  # noqa
-
-                ) + etree.tostring(node, method="text", encoding="unicode")
+        for node in BinaryPackage.SCRIPTS_XPATH(bin_node):
+            if node.tag in ["preinst", "postinst", "prerm", "postrm"]:
+                self.maintainer_scripts[node.tag] = script_header + \
+                    etree.tostring(node, method="text", encoding="unicode")
             #end if
         #end for
 
@@ -205,15 +231,13 @@ class BinaryPackage(BasePackage):
             self.collect_py_cache_files = False
         #end function
 
-        self.basedir        = os.path.realpath(".")
+        self.basedir        = "."
         self.output_dir     = "."
     #end function
 
     @property
     def version_tuple(self):
-        regexp = r"^(?:(\d+):)?([-.+~a-zA-Z0-9]+?)(?:-([.~+a-zA-Z0-9]+)){0,1}$"
-        m = re.match(regexp, self.version)
-        return m.group(1, 2, 3)
+        return BinaryPackage.VERSION_REGEX.match(self.version).group(1, 2, 3)
     #end function
 
     @property
@@ -222,11 +246,13 @@ class BinaryPackage(BasePackage):
 
     @basedir.setter
     def basedir(self, basedir):
+        if not (basedir or self.content_subdir):
+            return
+
         real_base_dir = os.path.realpath(basedir)
-        if basedir:
-            self._basedir = real_base_dir
         if self.content_subdir:
-            self._basedir = real_base_dir + os.sep + self.content_subdir
+            real_base_dir += os.sep + self.content_subdir
+        self._basedir = real_base_dir
     #end function
 
     @property
@@ -251,6 +277,8 @@ class BinaryPackage(BasePackage):
 
     def generate_file_list(self):
         contents = {}
+        stats_cache = {}
+        base_path = Path(self.basedir)
 
         for src, attr in self.content_spec.items():
             rel_path = os.path.normpath(src.lstrip(os.sep))
@@ -264,45 +292,57 @@ class BinaryPackage(BasePackage):
 
             listing  = []
 
-            for case in switch(deftype):
-                if case("dir"):
-                    attr.stats = FileStats.default_dir_stats()
-                    contents[src] = attr
-                    break
-                if case("file"):
-                    if glob.escape(src) != src or "{" in src:
-                        # entry is a glob pattern
-                        if "{" in src:
-                            expansions = list(braceexpand(rel_path))
-                        else:
-                            expansions = [rel_path]
-                        #end if
-                        for pattern in expansions:
-                            listing += list(Path(self.basedir).glob(pattern))
-                    elif os.path.isdir(abs_path) and not \
-                            os.path.islink(abs_path):
+            if deftype == "dir":
+                attr.stats = FileStats.default_dir_stats()
+                contents[src] = attr
+            elif deftype == "file":
+                if glob.escape(src) != src or "{" in src:
+                    # entry is a glob pattern
+                    if "{" in src:
+                        # alternatives may expand to the same pattern
+                        expansions = dict.fromkeys(braceexpand(rel_path))
+                    else:
+                        expansions = [rel_path]
+                    #end if
+                    for pattern in expansions:
+                        listing += [
+                            path.as_posix() for path in
+                                base_path.glob(pattern)
+                        ]
+                    #end for
+                else:
+                    try:
+                        stats_obj = os.lstat(abs_path)
+                    except (FileNotFoundError, NotADirectoryError):
+                        stats_obj = None
+
+                    if stats_obj and stat.S_ISDIR(stats_obj.st_mode):
                         # entry is a real directory
-                        listing = list(
-                            Path(self.basedir).rglob(rel_path + "/**/*")
-                        )
+                        listing = self._scan_tree(abs_path, stats_cache)
                         if src not in contents:
                             attr.stats = \
-                                FileStats.detect_from_filename(abs_path)
+                                FileStats.detect_from_stat(abs_path, stats_obj)
                             contents.setdefault(src, attr)
-                    else:
+                    elif stats_obj:
                         # entry is a symlink or file
-                        attr.stats = FileStats.detect_from_filename(abs_path)
+                        attr.stats = \
+                            FileStats.detect_from_stat(abs_path, stats_obj)
                         contents[src] = attr
-                    break
-                #end if
-            #end switch
+                    else:
+                        raise ValueError("no such file '%s'" % abs_path)
+                    #end if
+            #end if
 
-            for path in listing:
-                abs_path = path.as_posix()
-                pkg_path = os.sep + path.relative_to(self.basedir).as_posix()
+            for abs_path in listing:
+                pkg_path = os.sep + \
+                    abs_path[len(self.basedir):].lstrip(os.sep)
                 if pkg_path in contents:
                     continue
-                stats = FileStats.detect_from_filename(abs_path)
+                stats_obj = stats_cache.get(abs_path)
+                if stats_obj is None:
+                    stats = FileStats.detect_from_filename(abs_path)
+                else:
+                    stats = FileStats.detect_from_stat(abs_path, stats_obj)
                 contents[pkg_path] = BinaryPackage.EntryAttributes({
                     "deftype":  "file",
                     "mode":     mode,
@@ -316,6 +356,7 @@ class BinaryPackage(BasePackage):
 
         # make sure directories are included and collect byte code files
         extra_contents = {}
+        seen_dirs = set()
         for k in contents:
             if self.collect_py_cache_files and k.endswith(".py"):
                 py2_style = False
@@ -341,7 +382,7 @@ class BinaryPackage(BasePackage):
                 k_base_name = os.path.basename(k)[0:-3]
                 if not os.path.isdir(self.basedir + os.sep + k_cache_dir):
                     continue
-                listing = list(Path(self.basedir).glob(
+                listing = list(base_path.glob(
                     k_cache_dir.lstrip(os.sep) + os.sep + k_base_name +
                         ".cpython*.pyc"))
                 if not listing:
@@ -368,30 +409,43 @@ class BinaryPackage(BasePackage):
             while k != "/" and k != "":
                 k = os.path.dirname(k)
 
-                if (k not in contents) and (k not in extra_contents):
-                    abs_path = self.basedir + os.sep + k
-                    if os.path.exists(abs_path):
-                        extra_contents[k] = BinaryPackage.EntryAttributes({
-                            "deftype": "dir",
-                            "stats": FileStats.detect_from_filename(abs_path)
-                        })
-                    #end if
+                # ancestors of known entries are covered by their own walk
+                if (k in contents) or (k in extra_contents) or \
+                        (k in seen_dirs):
+                    break
+                seen_dirs.add(k)
+
+                abs_path = os.path.normpath(
+                    os.path.join(self.basedir, k.lstrip(os.sep))
+                )
+                stats_obj = stats_cache.get(abs_path)
+                if stats_obj is None:
+                    try:
+                        stats_obj = os.lstat(abs_path)
+                    except (FileNotFoundError, NotADirectoryError):
+                        continue
                 #end if
+
+                extra_contents[k] = BinaryPackage.EntryAttributes({
+                    "deftype": "dir",
+                    "stats": FileStats.detect_from_stat(abs_path, stats_obj)
+                })
             #end while
         #end for
         contents.update(extra_contents)
 
         if self.architecture == "tools":
             # filter out /etc and /var directories, these are shared
-            def filter_etc_var(item):
-                return False if item[0][0:4] in ["/etc", "/var"] \
-                        else True
-            #end inline function
-            self.contents = OrderedDict(sorted(filter(filter_etc_var,
-                set(contents.items())), key=lambda x: x[0]))
+            self.contents = dict(sorted(
+                (
+                    (k, v) for k, v in contents.items()
+                        if not k.startswith(("/etc", "/var"))
+                ),
+                key=operator.itemgetter(0)
+            ))
         else:
             self.contents = \
-                OrderedDict(sorted(set(contents.items()), key=lambda x: x[0]))
+                dict(sorted(contents.items(), key=operator.itemgetter(0)))
         #end if
 
         return self.contents
@@ -404,6 +458,7 @@ class BinaryPackage(BasePackage):
 
         chrpath = Platform.find_executable("chrpath")
         hardlinks = {}
+        strip_jobs = {}
         install_prefix = self.install_prefix.lstrip("/")
 
         # strip unstripped objects
@@ -441,43 +496,24 @@ class BinaryPackage(BasePackage):
             attr.dbg_info = pkg_path
 
             os.makedirs(os.path.dirname(dbg_path), exist_ok=True)
-
-            # if u+w bit is missing objcopy will bail out
-            if not (attr.stats.mode & stat.S_IWUSR):
-                os.chmod(src_path, attr.stats.mode | stat.S_IWUSR)
-
-            # separate debug information
-            if build_id:
-                cmd_list = [
-                    ([objcopy, "--only-keep-debug", src_path, dbg_path], True),
-                    ([objcopy, "--strip-unneeded",  src_path          ], True),
-                ]
-            else:
-                dbg_file = os.path.basename(dbg_path)
-                cmd_list = [
-                    ([objcopy, "--only-keep-debug", src_path, dbg_file], True),
-                    ([objcopy, "--strip-unneeded",  src_path          ], True),
-                    (
-                        [objcopy, "--add-gnu-debuglink", dbg_file, src_path],
-                        True
-                    ),
-                    (["mv", dbg_file, dbg_path], True),
-                ]
-
-            for cmd, check_retval in cmd_list:
-                subprocess.run(cmd, stderr=subprocess.STDOUT,
-                        check=check_retval)
-
-            subprocess.run(
-                [chrpath, "-c", src_path ],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                check=False
+            # copies with the same build-id share one debug file
+            strip_jobs.setdefault(dbg_path, []).append(
+                (src_path, attr.stats)
             )
-
-            # file size has changed
-            attr.stats.restat(src_path)
         #end for
+
+        # objects sharing a debug file are processed by the same worker
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=os.cpu_count()) as executor:
+            futures = [
+                executor.submit(self._strip_debug_symbols_and_unarm_rpath,
+                    objcopy, chrpath, dbg_path, objects)
+                for dbg_path, objects in strip_jobs.items()
+            ]
+
+            for future in concurrent.futures.as_completed(futures):
+                future.result()
+        #end with
     #end function
 
     def shlib_deps(self, shlib_cache, bin_pkgs):
@@ -485,50 +521,118 @@ class BinaryPackage(BasePackage):
             self.host_type + "-objdump", "objdump"
         )
 
-        for src, attr in self.contents.items():
-            fallback = None
-
-            if attr.stats.is_symbolic_link and src.endswith(".so"):
-                link_target = attr.stats.link_target
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=os.cpu_count()) as executor:
+            # run objdump on all ELF objects up front
+            needed_libs = {
+                src: executor.submit(self._needed_libraries, objdump,
+                    os.path.normpath(self.basedir + os.sep + src))
+                for src, attr in self.contents.items()
+                    if attr.stats.is_file and attr.stats.is_elf_binary
+            }
+
+            for src, attr in self.contents.items():
+                fallback = None
+
+                if attr.stats.is_symbolic_link and src.endswith(".so"):
+                    link_target = attr.stats.link_target
+
+                    if not os.path.isabs(link_target):
+                        link_target = os.path.normpath(os.path.dirname(src) +
+                                os.sep + link_target)
+                    else:
+                        fallback = "/usr"
+                    #end if
 
-                if not os.path.isabs(link_target):
-                    link_target = os.path.normpath(os.path.dirname(src) +
-                            os.sep + link_target)
-                else:
-                    fallback = "/usr"
+                    self._find_and_register_dependency(link_target,
+                            shlib_cache, bin_pkgs, hard_relation=True,
+                            fallback=fallback)
+                    continue
                 #end if
 
-                self._find_and_register_dependency(link_target, shlib_cache,
-                        bin_pkgs, hard_relation=True, fallback=fallback)
-                continue
-
-            if not attr.stats.is_file or not attr.stats.is_elf_binary:
-                continue
-
-            abs_path  = os.path.normpath(self.basedir + os.sep + src)
-            word_size = attr.stats.arch_word_size
-            cmd       = [objdump, "-p", abs_path]
+                if src not in needed_libs:
+                    continue
 
-            with subprocess.Popen(cmd, stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT, universal_newlines=True) as proc:
-                while True:
-                    line = proc.stdout.readline()
-                    if not line:
-                        break
+                word_size = attr.stats.arch_word_size
 
-                    m = re.match(r"^\s*NEEDED\s+(\S+)", line)
-                    if not m:
-                        continue
-                    lib_name = m.group(1)
+                for lib_name in needed_libs[src].result():
                     self._find_and_register_dependency(lib_name, shlib_cache,
                             bin_pkgs, word_size=word_size)
                 #end for
-            #end with
-        #end for
+            #end for
+        #end with
     #end function
 
     # PRIVATE
 
+    def _needed_libraries(self, objdump, abs_path):
+        output = subprocess.run(
+            [objdump, "-p", abs_path],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            check=False
+        ).stdout
+
+        return [
+            m.group(1).decode("utf-8") for m in
+                BinaryPackage.NEEDED_REGEX.finditer(output)
+        ]
+    #end function
+
+    def _strip_debug_symbols_and_unarm_rpath(self, objcopy, chrpath,
+            dbg_path, objects):
+        for src_path, stats in objects:
+            # if u+w bit is missing objcopy will bail out
+            if not (stats.mode & stat.S_IWUSR):
+                os.chmod(src_path, stats.mode | stat.S_IWUSR)
+
+            # separate debug information
+            cmd_list = [
+                [objcopy, "--only-keep-debug", src_path, dbg_path],
+                [objcopy, "--strip-unneeded",  src_path          ],
+            ]
+
+            # only the basename of the debug file goes into the debuglink
+            if not stats.build_id:
+                cmd_list.append(
+                    [objcopy, "--add-gnu-debuglink", dbg_path, src_path]
+                )
+
+            for cmd in cmd_list:
+                subprocess.run(cmd, stderr=subprocess.STDOUT, check=True)
+
+            subprocess.run(
+                [chrpath, "-c", src_path ],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                check=False
+            )
+
+            # file size has changed
+            stats.restat(src_path)
+        #end for
+    #end function
+
+    def _scan_tree(self, top, stats_cache):
+        listing = []
+        stack = [top]
+
+        # one lstat per entry, symlinked directories are not followed
+        while stack:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    stats_obj = entry.stat(follow_symlinks=False)
+                    stats_cache[entry.path] = stats_obj
+                    listing.append(entry.path)
+                    if stat.S_ISDIR(stats_obj.st_mode):
+                        stack.append(entry.path)
+                #end for
+            #end with
+        #end while
+
+        return listing
+    #end function
+
     def _find_and_register_dependency(self, lib_name, shlib_cache,
             bin_pkgs, word_size=None, hard_relation=False, fallback=None):
         found  = False
@@ -23,6 +23,8 @@
 # THE SOFTWARE.
 #
 
+import functools
+
 from dateutil.parser import parse as parse_datetime
 from lxml import etree
 
@@ -108,12 +110,20 @@ class Changelog:
     #end function
 
     def format_for_debian(self):
-        changelog_transform = etree.XSLT(
+        changelog_transform = Changelog._debian_changelog_transform()
+        return str(changelog_transform(self.changelog))
+    #end function
+
+    # PRIVATE
+
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _debian_changelog_transform():
+        return etree.XSLT(
             etree.fromstring(
                 Changelog.DEBIAN_CHANGELOG_TRANSFORM
             )
         )
-        return str(changelog_transform(self.changelog))
     #end function
 
 #end class
@@ -23,12 +23,12 @@
 # THE SOFTWARE.
 #
 
+import operator
 import os
 import stat
 import time
 
 from tempfile import TemporaryDirectory
-from collections import OrderedDict
 
 import yaybondi.ffi.libarchive as libarchive
 from yaybondi.ffi.libarchive import ArchiveEntry, ArchiveFileWriter
@@ -112,8 +112,8 @@ class DebianPackage(BinaryPackage):
                     default_dir_attrs
             contents[self.install_prefix + "/lib/debug/.build-id"] = \
                     default_dir_attrs
-            contents = OrderedDict(sorted(set(contents.items()),
-                key=lambda x: x[0]))
+            contents = \
+                dict(sorted(contents.items(), key=operator.itemgetter(0)))
         #end if
 
         self.assemble_parts(meta_data, contents, pkg_abspath)
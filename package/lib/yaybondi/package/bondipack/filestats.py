@@ -98,18 +98,25 @@ class FileStats:
 
     @staticmethod
     def detect_from_filename(filename):
-        if os.path.islink(filename):
+        try:
+            stats_obj = os.lstat(filename)
+        except (FileNotFoundError, NotADirectoryError):
+            raise ValueError("no such file '%s'" % filename)
+
+        return FileStats.detect_from_stat(filename, stats_obj)
+    #end function
+
+    @staticmethod
+    def detect_from_stat(filename, stats_obj):
+        if stat.S_ISLNK(stats_obj.st_mode):
             link_target = os.readlink(filename)
             magic_obj = FileMagic(
                     mime_type='inode/symlink', encoding='binary',
                     name='symbolic link to ' + link_target)
         else:
-            if not os.path.exists(filename):
-                raise ValueError("no such file '%s'" % filename)
             magic_obj = magic.detect_from_filename(filename)
         #end if
 
-        stats_obj = os.lstat(filename)
         filestats = FileStats(magic_obj, stats_obj)
 
         if filestats.is_symbolic_link:
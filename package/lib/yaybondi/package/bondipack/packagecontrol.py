@@ -266,7 +266,7 @@ class PackageControl:
                 pkg.basedir = self.defines["BONDI_INSTALL_DIR"]
 
                 if self.parms.get("outdir"):
-                    pkg.output_dir = os.path.realpath(self.parms["outdir"])
+                    pkg.output_dir = self.parms["outdir"]
 
                 self.bin_pkgs.append(pkg)
             #end for
@@ -408,9 +408,7 @@ class PackageControl:
             #end for
 
             if not fulfilled:
-                for dep in alternatives:
-                    unfulfilled_dependency_spec.index[dep.name] = dep
-                unfulfilled_dependency_spec.list.append(alternatives)
+                unfulfilled_dependency_spec.append(alternatives)
             #end if
         #end for
 
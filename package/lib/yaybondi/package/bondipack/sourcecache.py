@@ -157,8 +157,7 @@ class SourceCache:
             os.makedirs(os.path.dirname(target_url), exist_ok=True)
 
             with open(target_url, "wb+") as f:
-                for chunk in downloader.get(source_url, digest=h):
-                    f.write(chunk)
+                downloader.download_to_file(source_url, f, digest=h)
         except urllib.error.URLError as e:
             raise NetworkError(
                 "failed to retrieve {}: {}".format(source_url, e.reason)
@@ -198,8 +197,7 @@ class SourceCache:
             os.makedirs(os.path.dirname(target_url), exist_ok=True)
 
             with open(target_url, "wb+") as f:
-                for chunk in downloader.get(upstream_source, digest=h):
-                    f.write(chunk)
+                downloader.download_to_file(upstream_source, f, digest=h)
         except urllib.error.URLError as e:
             raise NetworkError(
                 "failed to retrieve {}: {}".format(upstream_source, e.reason)
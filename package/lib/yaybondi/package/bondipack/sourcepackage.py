@@ -24,7 +24,6 @@
 #
 
 import copy
-import hashlib
 import logging
 import os
 import re
@@ -37,6 +36,7 @@ from lxml import etree
 from yaybondi.error import PackagingError
 from yaybondi.ffi.libarchive import ArchiveFileReader
 
+from yaybondi.miscellaneous.downloader import Downloader
 from yaybondi.miscellaneous.platform import Platform
 
 from yaybondi.package.bondipack.packagedesc import PackageDescription
@@ -279,12 +279,7 @@ class SourcePackage(BasePackage):
                 .format(source_file)
             )
 
-            h = hashlib.sha256()
-            with open(source_file, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    h.update(chunk)
-
-            if sha256sum != h.hexdigest():
+            if sha256sum != Downloader.hash_file(source_file):
                 raise PackagingError(
                     "local candidate {} has incorrect checksum, aborting."
                 )
@@ -107,8 +107,7 @@ class DebianPackage(PackageUtilsMixin):
         LOGGER.info("fetching {}".format(url))
 
         with open(outfile, "wb+") as f:
-            for chunk in downloader.get(url):
-                f.write(chunk)
+            downloader.download_to_file(url, f)
         #end with
 
         self.contents = \
@@ -23,7 +23,6 @@
 # THE SOFTWARE.
 #
 
-import hashlib
 import itertools
 import logging
 import os
@@ -368,13 +367,7 @@ class DebianPackageCache:
         #end if
 
         try:
-            digest = hashlib.sha256()
-
-            with open(target, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    digest.update(chunk)
-
-            if digest.hexdigest() != sha256sum:
+            if Downloader.hash_file(target) != sha256sum:
                 raise BondiError('wrong hash for "{}".'.format(target))
 
             with ArchiveFileReader(target, raw=True) as archive:
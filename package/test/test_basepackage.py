@@ -0,0 +1,77 @@
+# -*- encoding: utf-8 -*-
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2016-2018 Tobias Koch <tobias.koch@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+import unittest
+
+from yaybondi.package.bondipack.basepackage import BasePackage
+
+class DependencySpecificationTest(unittest.TestCase):
+
+    def _spec(self):
+        spec = BasePackage.DependencySpecification.from_xml(
+            """
+            <requires>
+                <package name="zlib" version="&gt;= 1.2"/>
+                <choice>
+                    <package name="libc6"/>
+                    <package name="musl"/>
+                </choice>
+            </requires>
+            """
+        )
+        spec["bash"] = BasePackage.Dependency("bash", ">= 5.0")
+        return spec
+    #end function
+
+    def test_str_keeps_spec_order(self):
+        spec = self._spec()
+
+        expected = "zlib (>= 1.2), libc6 | musl, bash (>= 5.0)"
+        self.assertEqual(str(spec), expected)
+
+        # iterating must not reorder the control field
+        self.assertEqual(
+            [alternatives[0].name for alternatives in spec],
+            ["bash", "libc6", "zlib"]
+        )
+        self.assertEqual(str(spec), expected)
+    #end function
+
+    def test_iter_sees_appended_entries(self):
+        spec = self._spec()
+        list(spec)
+
+        spec.append([BasePackage.Dependency("acl")])
+
+        self.assertEqual(
+            [alternatives[0].name for alternatives in spec],
+            ["acl", "bash", "libc6", "zlib"]
+        )
+        self.assertEqual(
+            str(spec), "zlib (>= 1.2), libc6 | musl, bash (>= 5.0), acl"
+        )
+    #end function
+
+#end class
@@ -0,0 +1,131 @@
+# -*- encoding: utf-8 -*-
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2016-2018 Tobias Koch <tobias.koch@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+import os
+import tempfile
+import unittest
+
+from yaybondi.error import PackagingError
+from yaybondi.package.bondipack.binarypackage import BinaryPackage
+
+class GenerateFileListTest(unittest.TestCase):
+
+    PACKAGE_XML = """\
+<package name="foo" version="1.0" architecture="all" section="misc"
+        maintainer="Jane Doe" email="jane@example.com">
+    <description><summary>foo</summary></description>
+    <contents>%s</contents>
+</package>
+"""
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.basedir = os.path.realpath(tmpdir.name)
+    #end function
+
+    def _make_package(self, *sources):
+        pkg = BinaryPackage(
+            self.PACKAGE_XML % "".join(
+                '<file src="%s"/>' % src for src in sources
+            ),
+            host_type="x86_64-linux-gnu"
+        )
+        pkg.basedir = self.basedir
+        return pkg
+    #end function
+
+    def _touch(self, *paths):
+        for path in paths:
+            abs_path = os.path.join(self.basedir, path)
+            os.makedirs(os.path.dirname(abs_path), exist_ok=True)
+            open(abs_path, "w").close()
+        #end for
+    #end function
+
+    def test_parent_is_a_file(self):
+        self._touch("usr/bin/prog")
+        pkg = self._make_package("/usr/bin/prog/data")
+
+        with self.assertRaises(PackagingError):
+            pkg.prepare()
+    #end function
+
+    def test_missing_file(self):
+        pkg = self._make_package("/usr/bin/prog")
+
+        with self.assertRaises(PackagingError):
+            pkg.prepare()
+    #end function
+
+    def test_directory_listing(self):
+        self._touch(
+            "usr/lib/foo/a",
+            "usr/lib/foo/.hidden",
+            "usr/lib/foo/sub/b",
+            "opt/usr/lib/foo/stray",
+            "elsewhere/d/x"
+        )
+        os.symlink(
+            "../../../elsewhere/d",
+            os.path.join(self.basedir, "usr/lib/foo/dlink")
+        )
+
+        pkg = self._make_package("/usr/lib/foo")
+        pkg.prepare()
+
+        for path in [
+                "/usr/lib/foo",
+                "/usr/lib/foo/a",
+                "/usr/lib/foo/.hidden",
+                "/usr/lib/foo/sub",
+                "/usr/lib/foo/sub/b",
+                "/usr/lib/foo/dlink"]:
+            self.assertIn(path, pkg.contents)
+        #end for
+
+        self.assertTrue(pkg.contents["/usr/lib/foo/dlink"].stats
+            .is_symbolic_link)
+
+        # symlinked directories are not descended into and the listing is
+        # anchored at the given directory
+        self.assertNotIn("/usr/lib/foo/dlink/x", pkg.contents)
+        self.assertNotIn("/opt/usr/lib/foo/stray", pkg.contents)
+    #end function
+
+    def test_parent_dirs_of_relative_entry(self):
+        self._touch("usr/share/x/file")
+
+        pkg = self._make_package("usr/share/x/file")
+        pkg.prepare()
+
+        for path in ["usr/share/x", "usr/share", "usr"]:
+            self.assertIn(path, pkg.contents)
+            self.assertEqual(pkg.contents[path].deftype, "dir")
+            self.assertTrue(pkg.contents[path].stats.is_directory)
+        #end for
+    #end function
+
+#end class